@@ -26,12 +26,62 @@
 #include "filter.h"
 #include "util.h"
 
+#include <algorithm>
+#include <ctype.h>
 #include <fstream>
+#include <stdlib.h>
 
 
 using std::string;
 using std::vector;
 
+// Returns true if line segment p0-p1 intersects with segment p2-p3.
+static inline bool segmentsIntersect(float p0_x, float p0_y, float p1_x, float p1_y,
+                                     float p2_x, float p2_y, float p3_x, float p3_y) {
+  // See http://stackoverflow.com/questions/563198/how-do-you-detect-where-two-line-segments-intersect
+  float s1_x, s1_y, s2_x, s2_y;
+  s1_x = p1_x - p0_x;     s1_y = p1_y - p0_y;
+  s2_x = p3_x - p2_x;     s2_y = p3_y - p2_y;
+
+  float denominator = -s2_x * s1_y + s1_x * s2_y;
+  float s, t;
+  s = (-s1_y * (p0_x - p2_x) + s1_x * (p0_y - p2_y)) / denominator;
+  t = ( s2_x * (p0_y - p2_y) - s2_y * (p0_x - p2_x)) / denominator;
+
+  return s >= 0 && s <= 1 && t >= 0 && t <= 1;
+}
+
+// Append points from KML coordinate text, a whitespace-separated list of
+// lng,lat[,altitude] tuples, to polygon.  Parses in place to avoid creating
+// strings for each point, since polygons can have millions of points.
+static void parseCoordinates(const char *text, vector<LatLng> *polygon) {
+  const char *p = text;
+  while (*p != 0) {
+    char *end;
+    float lng = strtof(p, &end);  // note order in KML
+    if (end == p) {
+      ++p;  // separator or junk
+      continue;
+    }
+    p = end;
+    if (*p != ',') {
+      continue;
+    }
+    ++p;
+    float lat = strtof(p, &end);
+    if (end == p) {
+      continue;
+    }
+    p = end;
+    polygon->push_back(LatLng(lat, lng));
+
+    // Skip altitude, if any
+    while (*p != 0 && !isspace(static_cast<unsigned char>(*p))) {
+      ++p;
+    }
+  }
+}
+
 Filter::Filter()
     : mWrapLongitude(-180) {
 }
@@ -67,17 +117,7 @@ bool Filter::addPolygonsFromKml(const string &filename) {
         coordsStr = line.substr(0, pos);
         endFound = true;
       } 
-      vector<string> pointText;
-      vector<string> elements;
-      split(coordsStr, ' ', pointText);
-      for (const string &eachPoint : pointText) {
-        split(eachPoint, ',', elements);
-        if (elements.size() >= 2) {
-          float lat = stof(elements[1]);  // note order in KML
-          float lng = stof(elements[0]);
-          polygon.push_back(LatLng(lat, lng));
-        }
-      }
+      parseCoordinates(coordsStr.c_str(), &polygon);
     }
 
     if (endFound || line.find("</coordinates>") != string::npos) {
@@ -87,6 +127,8 @@ bool Filter::addPolygonsFromKml(const string &filename) {
     } 
   }
 
+  computePolygonBounds();
+
   int numPoints = 0;
   for (auto &polygon : mPolygons) {
     numPoints += polygon.size();
@@ -103,28 +145,47 @@ bool Filter::isPointInside(const LatLng &latlng) const {
     return true;
   }
 
-  for (auto &polygon : mPolygons) {
+  float testx = latlng.longitude();
+  float testy = latlng.latitude();
+
+  // Allow wrapping around antimeridian
+  if (testx < mWrapLongitude) {
+    testx += 360;
+  }
+
+  for (int p = 0; p < (int) mPolygons.size(); ++p) {
+    const vector<LatLng> &polygon = mPolygons[p];
     if (polygon.empty()) {
       continue;
     }
-    
-    bool inside = false;
-    float testx = latlng.longitude();
-    float testy = latlng.latitude();
-    
-    // Allow wrapping around antimeridian
-    if (testx < mWrapLongitude) {
-      testx += 360;
+
+    // A point outside the polygon's bounds crosses an even number of edges
+    const Bounds &bounds = mPolygonBounds[p];
+    if (testy < bounds.minLat || testy > bounds.maxLat ||
+        testx < bounds.minLng || testx > bounds.maxLng) {
+      continue;
     }
-    
+
     // Horizontal ray cast, check parity of # of polygon intersections.
-    // See http://stackoverflow.com/questions/11716268/point-in-polygon-algorithm 
-    for (int i = 0, j = polygon.size() - 1; i < (int) polygon.size(); j = i++) {
-      if ( ((polygon[i].latitude() > testy) != (polygon[j].latitude() > testy)) &&
-           (testx < (polygon[j].longitude() - polygon[i].longitude()) *
-            (testy - polygon[i].latitude()) / (polygon[j].latitude()-polygon[i].latitude()) + polygon[i].longitude()) )
-        inside = !inside;
+    // See http://stackoverflow.com/questions/11716268/point-in-polygon-algorithm
+    //
+    // Crossings are counted without branches, since they're unpredictable for
+    // convoluted polygons, and this lets the compiler vectorize the loop.  If an
+    // edge is horizontal, the division can give inf or NaN, but then the edge
+    // doesn't straddle testy and the crossing is discarded.
+    int numCrossings = 0;
+    int n = polygon.size();
+    for (int i = 0; i < n; ++i) {
+      int j = (i == 0) ? n - 1 : i - 1;
+      float xi = polygon[i].longitude();
+      float yi = polygon[i].latitude();
+      float xj = polygon[j].longitude();
+      float yj = polygon[j].latitude();
+      bool straddles = (yi > testy) != (yj > testy);
+      bool crosses = testx < (xj - xi) * (testy - yi) / (yj - yi) + xi;
+      numCrossings += straddles & crosses;
     }
+    bool inside = (numCrossings & 1) != 0;
 
     if (inside) {
       return true;
@@ -149,6 +210,7 @@ void Filter::setWrapLongitude(float wrapLongitude) {
     newPolygons.push_back(newPoints);
   }
   mPolygons = newPolygons;
+  computePolygonBounds();
 }
 
 bool Filter::intersects(float minLat, float maxLat, float minLng, float maxLng) const {
@@ -161,17 +223,37 @@ bool Filter::intersects(float minLat, float maxLat, float minLng, float maxLng)
     return true;
   }
 
-  for (auto &polygon : mPolygons) {
+  for (int p = 0; p < (int) mPolygons.size(); ++p) {
+    const vector<LatLng> &polygon = mPolygons[p];
+
+    // Skip polygons whose bounds don't touch the rectangle
+    const Bounds &bounds = mPolygonBounds[p];
+    if (maxLat < bounds.minLat || minLat > bounds.maxLat ||
+        maxLng < bounds.minLng || minLng > bounds.maxLng) {
+      continue;
+    }
+
     // Try intersecting the four sides of the rectangle with all edges of the polygon
     LatLng points[4] = { p1, p2, p3, p4};
-    for (int i = 0; i < 4; ++i) {
-      const LatLng &point1 = points[i];
-      const LatLng &point2 = points[(i + 1) % 4];
-      for (int j = 0, k = polygon.size() - 1; j < (int) polygon.size(); k = j++) {
+    for (int j = 0, k = polygon.size() - 1; j < (int) polygon.size(); k = j++) {
+      const LatLng &edge1 = polygon[j];
+      const LatLng &edge2 = polygon[k];
+
+      // An edge entirely outside the rectangle's bounds can't cross any side
+      if (std::max(edge1.latitude(), edge2.latitude()) < minLat ||
+          std::min(edge1.latitude(), edge2.latitude()) > maxLat ||
+          std::max(edge1.longitude(), edge2.longitude()) < minLng ||
+          std::min(edge1.longitude(), edge2.longitude()) > maxLng) {
+        continue;
+      }
+
+      for (int i = 0; i < 4; ++i) {
+        const LatLng &point1 = points[i];
+        const LatLng &point2 = points[(i + 1) % 4];
         if (segmentsIntersect(point1.longitude(), point1.latitude(),
                               point2.longitude(), point2.latitude(),
-                              polygon[j].longitude(), polygon[j].latitude(),
-                              polygon[k].longitude(), polygon[k].latitude())) {
+                              edge1.longitude(), edge1.latitude(),
+                              edge2.longitude(), edge2.latitude())) {
           return true;
         }
       }
@@ -221,23 +303,16 @@ void Filter::getBounds(LatLng *sw, LatLng *ne) const {
   }
 }
 
-// Returns true if the lines intersect, otherwise false.
-bool Filter::segmentsIntersect(float p0_x, float p0_y, float p1_x, float p1_y,
-                               float p2_x, float p2_y, float p3_x, float p3_y) const {
-  // See http://stackoverflow.com/questions/563198/how-do-you-detect-where-two-line-segments-intersect
-  float s1_x, s1_y, s2_x, s2_y;
-  s1_x = p1_x - p0_x;     s1_y = p1_y - p0_y;
-  s2_x = p3_x - p2_x;     s2_y = p3_y - p2_y;
-
-  float s, t;
-  s = (-s1_y * (p0_x - p2_x) + s1_x * (p0_y - p2_y)) / (-s2_x * s1_y + s1_x * s2_y);
-  t = ( s2_x * (p0_y - p2_y) - s2_y * (p0_x - p2_x)) / (-s2_x * s1_y + s1_x * s2_y);
-
-  if (s >= 0 && s <= 1 && t >= 0 && t <= 1) {
-    return true;
+void Filter::computePolygonBounds() {
+  mPolygonBounds.clear();
+  for (auto &polygon : mPolygons) {
+    Bounds bounds = { 999, -999, 999, -999 };
+    for (const LatLng &point : polygon) {
+      bounds.minLat = std::min(bounds.minLat, point.latitude());
+      bounds.maxLat = std::max(bounds.maxLat, point.latitude());
+      bounds.minLng = std::min(bounds.minLng, point.longitude());
+      bounds.maxLng = std::max(bounds.maxLng, point.longitude());
+    }
+    mPolygonBounds.push_back(bounds);
   }
-
-  return false;
 }
-      
-
@@ -59,12 +59,19 @@ public:
   void getBounds(LatLng *sw, LatLng *ne) const;
   
 private:
+  // Axis-aligned bounding box of a polygon
+  struct Bounds {
+    float minLat, maxLat;
+    float minLng, maxLng;
+  };
+
   std::vector<std::vector<LatLng>> mPolygons;
+  // Bounds of each polygon in mPolygons, used to skip polygons quickly
+  std::vector<Bounds> mPolygonBounds;
   float mWrapLongitude;
 
-  // Returns true if line segment p0-p1 intersects with segment p2-p3.
-  bool segmentsIntersect(float p0_x, float p0_y, float p1_x, float p1_y,
-                         float p2_x, float p2_y, float p3_x, float p3_y) const;  
+  // Recompute mPolygonBounds; must be called whenever mPolygons changes.
+  void computePolygonBounds();
 };
 
 #endif  // _FILTER_H_
@@ -39,6 +39,7 @@
 #ifdef PLATFORM_WINDOWS
 #include "getopt-win.h"
 #endif
+#include <algorithm>
 #include <cmath>
 #include <set>
 
@@ -145,19 +146,34 @@ int main(int argc, char **argv) {
   ThreadPool *threadPool = new ThreadPool(numThreads);
   int num_tiles_processed = 0;
   vector<std::future<bool>> results;
-  for (int lat = (int) floor(bounds[0]); lat < (int) ceil(bounds[1]); ++lat) {
-     for (int lng = (int) floor(bounds[2]); lng < (int) ceil(bounds[3]); ++lng) {
-      // Skip some very slow tiles known to have no peaks
-      Offsets coords(lat, lng);
-      if (tilesToSkip.find(coords.value()) != tilesToSkip.end()) {
-        VLOG(1) << "Skipping slow tile " << lat << " " << lng;
-        continue;
+  // Visit tiles in square blocks rather than in full rows, so that the
+  // neighbors loaded by isolation searches stay in the cache while the
+  // next row of the block is processed.  A block plus its one-tile border
+  // (49 tiles) fits in CACHE_SIZE.
+  const int BLOCK_SIZE = 5;
+  int minLat = (int) floor(bounds[0]);
+  int maxLat = (int) ceil(bounds[1]);
+  int minLng = (int) floor(bounds[2]);
+  int maxLng = (int) ceil(bounds[3]);
+  for (int blockLat = minLat; blockLat < maxLat; blockLat += BLOCK_SIZE) {
+    for (int blockLng = minLng; blockLng < maxLng; blockLng += BLOCK_SIZE) {
+      for (int lat = blockLat; lat < std::min(blockLat + BLOCK_SIZE, maxLat); ++lat) {
+        for (int lng = blockLng; lng < std::min(blockLng + BLOCK_SIZE, maxLng); ++lng) {
+          // Skip some very slow tiles known to have no peaks
+          Offsets coords(lat, lng);
+          if (tilesToSkip.find(coords.value()) != tilesToSkip.end()) {
+            VLOG(1) << "Skipping slow tile " << lat << " " << lng;
+            continue;
+          }
+
+          IsolationTask *task = new IsolationTask(cache, output_directory, bounds, minIsolation);
+          results.push_back(threadPool->enqueue([=] {
+                bool retval = task->run(lat, lng, peakbagger_peaks);
+                delete task;
+                return retval;
+              }));
+        }
       }
-
-      IsolationTask *task = new IsolationTask(cache, output_directory, bounds, minIsolation);
-      results.push_back(threadPool->enqueue([=] {
-            return task->run(lat, lng, peakbagger_peaks);
-          }));
     }
   }
 
@@ -211,7 +211,9 @@ int main(int argc, char **argv) {
       ProminenceTask *task = new ProminenceTask(cache, output_directory, bounds, minProminence);
       task->setAntiprominence(antiprominence);
       results.push_back(threadPool->enqueue([=] {
-            return task->run(lat, wrappedLng);
+            bool retval = task->run(lat, wrappedLng);
+            delete task;
+            return retval;
           }));
     }
   }
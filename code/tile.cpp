@@ -172,40 +172,57 @@ Tile *Tile::loadFromFltFile(const string &directory, int minLat, int minLng, Fil
     return nullptr;
   }
 
+  Tile *tile = loadFromFltStream(infile, filename, minLat, minLng, format);
+  fclose(infile);
+
+  return tile;
+}
+
+Tile *Tile::loadFromFltStream(FILE *infile, const string &filename,
+                              int minLat, int minLng, FileFormat format) {
   const int rawSideLength = (format == FileFormat::NED13_ZIP ? FLT_13_RAW_SIZE : FLT_1_RAW_SIZE);
   const int tileSideLength = rawSideLength - 2 * FLT_EXTRA_BORDER + 1;
   int num_raw_samples = rawSideLength * rawSideLength;
   
   Elevation *samples = (Elevation *) malloc(sizeof(Elevation) * tileSideLength * tileSideLength);
-  float *inbuf = new float[num_raw_samples];
+
+  // Read one raw row at a time rather than buffering the whole file, which is
+  // hundreds of MB for 1/3 arcsecond data.
+  float *inbuf = new float[rawSideLength];
   
   Tile *retval = nullptr;
-  int num_read = fread(inbuf, sizeof(float), num_raw_samples, infile);
+  int num_read = 0;
+  for (int i = 0; i < rawSideLength; ++i) {
+    int row_read = fread(inbuf, sizeof(float), rawSideLength, infile);
+    num_read += row_read;
+    if (row_read != rawSideLength) {
+      break;
+    }
+
+    // Discard extra overlap so that just 1 pixel remains around the outsides.
+    if (i < FLT_EXTRA_BORDER || i >= tileSideLength + FLT_EXTRA_BORDER) {
+      continue;
+    }
+
+    Elevation *row = samples + (i - FLT_EXTRA_BORDER) * tileSideLength;
+    for (int j = 0; j < tileSideLength; ++j) {
+      float sample = inbuf[j + FLT_EXTRA_BORDER];
+      
+      // Convert NED nodata to SRTM nodata
+      if (fabs(sample - NED_NODATA_ELEVATION) < 0.01) {
+        row[j] = NODATA_ELEVATION;
+      } else {
+        // Use feet internally; small unit avoids losing precision with external data
+        row[j] = (Elevation) metersToFeet(sample);
+      }
+    }
+  }
+  
   if (num_read != num_raw_samples) {
     fprintf(stderr, "Couldn't read tile file: %s, got %d samples expecting %d\n",
             filename.c_str(), num_read, num_raw_samples);
     free(samples);
     samples = nullptr;
-  } else {
-    // Discard extra overlap so that just 1 pixel remains around the outsides.
-    // Overwrites samples array in-place
-    for (int i = 0; i < rawSideLength; ++i) {
-      for (int j = 0; j < rawSideLength; ++j) {
-        float sample = inbuf[i * rawSideLength + j];
-        
-        // Convert NED nodata to SRTM nodata
-        if (i >= FLT_EXTRA_BORDER && i < tileSideLength + FLT_EXTRA_BORDER &&
-            j >= FLT_EXTRA_BORDER && j < tileSideLength + FLT_EXTRA_BORDER) {
-          int index = ((i - FLT_EXTRA_BORDER) * tileSideLength) + (j - FLT_EXTRA_BORDER);
-          if (fabs(sample - NED_NODATA_ELEVATION) < 0.01) {
-            samples[index] = NODATA_ELEVATION;
-          } else {
-            // Use feet internally; small unit avoids losing precision with external data
-            samples[index] = (Elevation) metersToFeet(sample);
-          }
-        }
-      }
-    }
   }
   
   if (samples != nullptr) {
@@ -226,7 +243,6 @@ Tile *Tile::loadFromFltFile(const string &directory, int minLat, int minLng, Fil
   }
 
   delete [] inbuf;
-  fclose(infile);
 
   return retval;  
 }
@@ -297,16 +313,13 @@ Tile *Tile::loadFromNEDZipFileInternal(const std::string &directory,
     return nullptr;
   }
   
-  string tempDirectory = getTempDir();
   string fltFilename = getFltFilename(minLat, minLng, format);
 
-  // Unzip flt file from zip to temp dir
 #ifdef PLATFORM_WINDOWS
+  // Unzip flt file from zip to temp dir
+  string tempDirectory = getTempDir();
   string command = "7z x \"" + filename + "\" " + fltFilename + " -y -o" + tempDirectory
     + " > nul";
-#else  
-  string command = "unzip -o \"" + filename + "\" " + fltFilename + " -d " + tempDirectory;
-#endif
   VLOG(2) << "Unzip command is " << command;
   int retval = system(command.c_str());
   if (retval != 0) {
@@ -318,6 +331,24 @@ Tile *Tile::loadFromNEDZipFileInternal(const std::string &directory,
   // Delete temp file
   string fltFullFilename = tempDirectory + "/" + fltFilename;
   remove(fltFullFilename.c_str());
+#else
+  // Stream flt file straight out of the zip, rather than writing it to a
+  // temp file and reading it back
+  string command = "unzip -p \"" + filename + "\" " + fltFilename;
+  VLOG(2) << "Unzip command is " << command;
+  FILE *pipe = popen(command.c_str(), "r");
+  if (pipe == nullptr) {
+    LOG(ERROR) << "Command failed: " << command;
+    return nullptr;
+  }
+  
+  Tile *tile = loadFromFltStream(pipe, filename, minLat, minLng, format);
+
+  int retval = pclose(pipe);
+  if (retval != 0) {
+    LOG(ERROR) << "Command failed: " << command;
+  }
+#endif
   
   return tile;  
 }
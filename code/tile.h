@@ -32,6 +32,7 @@
 #include "primitives.h"
 #include "latlng.h"
 
+#include <stdio.h>
 #include <vector>
 #include <string>
 
@@ -161,6 +162,10 @@ private:
   // format gives the resolution of the NED data
   static Tile *loadFromFltFile(const std::string &directory, int minLat, int minLng,
                                FileFormat format);
+
+  // Read .flt data from an open stream; filename is used only for error messages
+  static Tile *loadFromFltStream(FILE *infile, const std::string &filename,
+                                 int minLat, int minLng, FileFormat format);
   
   // Return the filename for the .flt file for the given coordinates
   static std::string getFltFilename(int minLat, int minLng, FileFormat format);
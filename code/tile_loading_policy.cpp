@@ -26,6 +26,8 @@
 #include "tile.h"
 #include "easylogging++.h"
 
+#include <memory>
+
 using std::string;
 
 BasicTileLoadingPolicy::BasicTileLoadingPolicy(const string &directory, FileFormat format)
@@ -59,7 +61,8 @@ Tile *BasicTileLoadingPolicy::loadTile(int minLat, int minLng) const {
   // fixing it isn't necessary.
   //
   if (mNeighborEdgeLoadingEnabled) {
-    Tile *neighbor = loadInternal(minLat - 1, minLng);  // bottom neighbor
+    // Neighbors are needed only for their edges; don't leak them
+    std::unique_ptr<Tile> neighbor(loadInternal(minLat - 1, minLng));  // bottom neighbor
     if (neighbor != nullptr) {
       for (int i = 0; i < tile->width(); ++i) {
         tile->set(i, tile->height() - 1, neighbor->get(i, 0));
@@ -67,7 +70,7 @@ Tile *BasicTileLoadingPolicy::loadTile(int minLat, int minLng) const {
     }
 
     int rightLng = (minLng == 179) ? -180 : (minLng + 1);  // antimeridian
-    neighbor = loadInternal(minLat, rightLng);  // right neighbor
+    neighbor.reset(loadInternal(minLat, rightLng));  // right neighbor
     if (neighbor != nullptr) {
       for (int i = 0; i < tile->height(); ++i) {
         tile->set(tile->width() - 1, i, neighbor->get(0, i));